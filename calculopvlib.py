@@ -1,12 +1,20 @@
+import numpy as np
 import pvlib
 import pandas as pd
 
-def calcular_geracao_pv(df_info_geral, df_elementos, eficiencia_painel, eficiencia_inversor, perdas_sistema):
+# Número de elementos calculados por vez. Limita o tamanho das matrizes (horas x elementos)
+# e dos temporários do pvlib, mantendo o pico de memória constante para qualquer modelo IFC.
+TAMANHO_BLOCO = 128
+
+def calcular_geracao_pv(df_info_geral, df_elementos, eficiencia_painel, eficiencia_inversor, perdas_sistema,
+                        modelo_detalhado=False, coef_temperatura=-0.004,
+                        modelo_temperatura="open_rack_glass_glass"):
     """
     Calcula a geração de energia fotovoltaica para uma lista de elementos (telhados ou janelas).
 
     Esta função é genérica e pode ser usada para qualquer superfície, desde que o DataFrame
-    de entrada contenha as colunas necessárias.
+    de entrada contenha as colunas necessárias. Os dados climáticos do PVGIS são obtidos aqui
+    e o cálculo em si é feito por `calcular_energia_anual`.
 
     Args:
         df_info_geral (pd.DataFrame): DataFrame contendo 'Latitude' e 'Longitude'.
@@ -18,6 +26,14 @@ def calcular_geracao_pv(df_info_geral, df_elementos, eficiencia_painel, eficienc
         eficiencia_painel (float): Eficiência do módulo fotovoltaico (ex: 0.22 para 22%).
         eficiencia_inversor (float): Eficiência do inversor (ex: 0.96 para 96%).
         perdas_sistema (float): Perdas totais agregadas do sistema (ex: 0.14 para 14%).
+        modelo_detalhado (bool): Se True, usa difusa de Perez, modificador de ângulo de
+                                 incidência (IAM) e temperatura de célula (modelo SAPM)
+                                 com eficiência dependente da temperatura.
+        coef_temperatura (float): Coeficiente de temperatura da potência (1/°C), usado
+                                  apenas no modelo detalhado (ex: -0.004 para -0,4 %/°C).
+        modelo_temperatura (str): Tipo de montagem do modelo térmico SAPM, usado apenas
+                                  no modelo detalhado (ex: 'open_rack_glass_glass',
+                                  'close_mount_glass_glass').
 
     Returns:
         pd.DataFrame: O DataFrame original dos elementos com uma nova coluna
@@ -53,46 +69,164 @@ def calcular_geracao_pv(df_info_geral, df_elementos, eficiencia_painel, eficienc
     )
 
     # --- 3. Cálculo de Geração por Elemento ---
-    resultados = []
     cols_req = ["ElementoID", "Área Bruta (m²)", "Inclinação (°)", "Orientação (Azimute °)"]
     elementos_para_calculo = df_elementos[cols_req].copy()
 
-    for _, row in elementos_para_calculo.iterrows():
-        area_total = float(row["Área Bruta (m²)"])
-        tilt = float(row["Inclinação (°)"])
-        azimuth = float(row["Orientação (Azimute °)"])
-
-        # Calcula a irradiância total no plano do elemento (POA - Plane of Array)
-        irr = pvlib.irradiance.get_total_irradiance(
-            surface_tilt=tilt,
-            surface_azimuth=azimuth,
-            solar_zenith=posicao_sol["apparent_zenith"],
-            solar_azimuth=posicao_sol["azimuth"],
-            dni=weather["dni"],
-            ghi=weather["ghi"],
-            dhi=weather["dhi"],
-        )
-        irr_df = pd.DataFrame(irr)
-
-        # Potência de pico dos módulos (kW) para uma irradiância padrão de 1000 W/m²
-        potencia_paineis_kw = area_total * eficiencia_painel
-
-        # Energia DC horária (kWh) = Irradiância (kW/m²) * Área (m²) * Eficiência
-        energia_dc_kwh = (irr_df["poa_global"] / 1000.0) * potencia_paineis_kw
-
-        # Energia AC (kWh) considerando eficiências do inversor e perdas do sistema
-        energia_ac_kwh = energia_dc_kwh * eficiencia_inversor * (1.0 - perdas_sistema)
-
-        # Adiciona o resultado anual total à lista
-        resultados.append({
-            "ElementoID": row["ElementoID"],
-            "Geração Anual Estimada (kWh)": float(energia_ac_kwh.sum())
-        })
+    geracao_anual = calcular_energia_anual(
+        weather,
+        posicao_sol,
+        elementos_para_calculo["Área Bruta (m²)"].to_numpy(dtype=float),
+        elementos_para_calculo["Inclinação (°)"].to_numpy(dtype=float),
+        elementos_para_calculo["Orientação (Azimute °)"].to_numpy(dtype=float),
+        eficiencia_painel,
+        eficiencia_inversor,
+        perdas_sistema,
+        modelo_detalhado=modelo_detalhado,
+        coef_temperatura=coef_temperatura,
+        modelo_temperatura=modelo_temperatura,
+    )
 
     # --- 4. Consolidação dos Resultados ---
-    df_resultados = pd.DataFrame(resultados)
+    df_resultados = pd.DataFrame({
+        "ElementoID": elementos_para_calculo["ElementoID"].to_numpy(),
+        "Geração Anual Estimada (kWh)": geracao_anual,
+    })
     df_unidos = df_elementos.merge(df_resultados, how="left")
 
     df_unidos = df_unidos.drop(columns=["ElementoID"])
 
-    return df_unidos
\ No newline at end of file
+    return df_unidos
+
+
+def calcular_energia_anual(weather, posicao_sol, area_total, tilt, azimuth, eficiencia_painel,
+                           eficiencia_inversor, perdas_sistema, modelo_detalhado=False,
+                           coef_temperatura=-0.004, modelo_temperatura="open_rack_glass_glass",
+                           tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Calcula a geração anual AC de cada elemento a partir de dados climáticos já obtidos.
+
+    Não faz nenhuma chamada de rede, o que permite validar os modelos com dados sintéticos.
+    Os elementos são processados em blocos de `tamanho_bloco` colunas; dentro de cada bloco
+    todas as horas e superfícies são avaliadas de uma só vez, como matrizes (horas x elementos).
+
+    Args:
+        weather (pd.DataFrame): Dados horários com 'ghi', 'dni', 'dhi', 'temp_air' e 'wind_speed'.
+        posicao_sol (pd.DataFrame): Posição solar com 'apparent_zenith' e 'azimuth'.
+        area_total (np.ndarray): Área de cada elemento (m²).
+        tilt (np.ndarray): Inclinação de cada elemento (°).
+        azimuth (np.ndarray): Orientação (azimute) de cada elemento (°).
+        eficiencia_painel, eficiencia_inversor, perdas_sistema, modelo_detalhado,
+        coef_temperatura, modelo_temperatura: Ver `calcular_geracao_pv`.
+        tamanho_bloco (int): Número máximo de elementos calculados por vez.
+
+    Returns:
+        np.ndarray: Geração anual estimada (kWh) de cada elemento, na ordem de entrada.
+    """
+    area_total = np.asarray(area_total, dtype=float)
+    tilt = np.asarray(tilt, dtype=float)
+    azimuth = np.asarray(azimuth, dtype=float)
+
+    if len(tilt) == 0:
+        return np.zeros(0)
+
+    # Séries horárias viram colunas (n_horas, 1); dependem só do tempo e são calculadas uma vez
+    def _coluna(serie):
+        return np.asarray(serie, dtype=float)[:, np.newaxis]
+
+    zenith = _coluna(posicao_sol["apparent_zenith"])
+    azimuth_sol = _coluna(posicao_sol["azimuth"])
+    dni = _coluna(weather["dni"])
+    ghi = _coluna(weather["ghi"])
+    dhi = _coluna(weather["dhi"])
+
+    # Potência de pico dos módulos (kW) para uma irradiância padrão de 1000 W/m²
+    potencia_paineis_kw = area_total * eficiencia_painel
+
+    if modelo_detalhado:
+        # Difusa do céu pelo modelo de Perez, que precisa da irradiância extraterrestre
+        # e da massa de ar relativa
+        dni_extra = _coluna(pvlib.irradiance.get_extra_radiation(weather.index))
+        airmass = _coluna(pvlib.atmosphere.get_relative_airmass(posicao_sol["apparent_zenith"]))
+        temp_air = _coluna(weather["temp_air"])
+        wind_speed = _coluna(weather["wind_speed"])
+        parametros_temp = pvlib.temperature.TEMPERATURE_MODEL_PARAMETERS["sapm"][modelo_temperatura]
+
+        # O IAM difuso (integração de Marion) depende apenas da inclinação, e os elementos
+        # BIPV repetem poucas inclinações: integra-se só as inclinações distintas
+        tilts_unicos, indice_tilt = np.unique(tilt, return_inverse=True)
+        iam_difuso = pvlib.iam.marion_diffuse("physical", tilts_unicos)
+        iam_ceu = np.asarray(iam_difuso["sky"])[indice_tilt]
+        iam_solo = np.asarray(iam_difuso["ground"])[indice_tilt]
+
+    resultados = []
+    for inicio in range(0, len(tilt), tamanho_bloco):
+        bloco = slice(inicio, inicio + tamanho_bloco)
+        forma = (len(zenith), len(tilt[bloco]))
+
+        def _matriz(valores):
+            return np.broadcast_to(valores, forma)
+
+        tilt_2d = _matriz(tilt[bloco][np.newaxis, :])
+        azimuth_2d = _matriz(azimuth[bloco][np.newaxis, :])
+        zenith_2d = _matriz(zenith)
+        azimuth_sol_2d = _matriz(azimuth_sol)
+
+        if not modelo_detalhado:
+            # Calcula a irradiância total no plano do elemento (POA - Plane of Array)
+            irr = pvlib.irradiance.get_total_irradiance(
+                surface_tilt=tilt_2d,
+                surface_azimuth=azimuth_2d,
+                solar_zenith=zenith_2d,
+                solar_azimuth=azimuth_sol_2d,
+                dni=_matriz(dni),
+                ghi=_matriz(ghi),
+                dhi=_matriz(dhi),
+            )
+
+            # Energia DC horária (kWh) = Irradiância (kW/m²) * Área (m²) * Eficiência
+            energia_dc_kwh = (irr["poa_global"] / 1000.0) * potencia_paineis_kw[bloco]
+        else:
+            irr = pvlib.irradiance.get_total_irradiance(
+                surface_tilt=tilt_2d,
+                surface_azimuth=azimuth_2d,
+                solar_zenith=zenith_2d,
+                solar_azimuth=azimuth_sol_2d,
+                dni=_matriz(dni),
+                ghi=_matriz(ghi),
+                dhi=_matriz(dhi),
+                dni_extra=_matriz(dni_extra),
+                airmass=_matriz(airmass),
+                model="perez",
+            )
+            poa_direct = np.nan_to_num(irr["poa_direct"])
+            poa_sky = np.nan_to_num(irr["poa_sky_diffuse"])
+            poa_ground = np.nan_to_num(irr["poa_ground_diffuse"])
+
+            # Modificador de ângulo de incidência (vidro) para a componente direta
+            aoi = pvlib.irradiance.aoi(tilt_2d, azimuth_2d, zenith_2d, azimuth_sol_2d)
+            iam_direto = pvlib.iam.physical(aoi)
+
+            irradiancia_efetiva = (
+                poa_direct * iam_direto
+                + poa_sky * iam_ceu[bloco][np.newaxis, :]
+                + poa_ground * iam_solo[bloco][np.newaxis, :]
+            )
+
+            # Temperatura de célula (SAPM) a partir da temperatura do ar e do vento do TMY
+            temp_celula = pvlib.temperature.sapm_cell(
+                poa_direct + poa_sky + poa_ground,
+                _matriz(temp_air),
+                _matriz(wind_speed),
+                **parametros_temp,
+            )
+
+            # Energia DC horária (kWh) com eficiência corrigida pela temperatura (PVWatts)
+            energia_dc_kwh = pvlib.pvsystem.pvwatts_dc(
+                irradiancia_efetiva, temp_celula, potencia_paineis_kw[bloco], coef_temperatura
+            )
+
+        # Energia AC (kWh) considerando eficiências do inversor e perdas do sistema
+        energia_ac_kwh = energia_dc_kwh * eficiencia_inversor * (1.0 - perdas_sistema)
+        resultados.append(np.nansum(energia_ac_kwh, axis=0))
+
+    return np.concatenate(resultados)
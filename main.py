@@ -103,11 +103,13 @@ if uploaded_file:
                 ef_inversor_t = st.number_input("Eficiência do Inversor (0–1)", 0.0, 1.0, 0.96, 0.01, key="inversor_t")
             with col3:
                 perdas_t = st.number_input("Perdas do Sistema (0–1)", 0.0, 1.0, 0.14, 0.01, key="perdas_t")
+            detalhado_t = st.checkbox("Modelo detalhado (Perez, IAM e temperatura de célula)", key="detalhado_t", help="Considera a difusa de Perez, o ângulo de incidência e a temperatura do ar e o vento do TMY.")
 
         if st.button("☀️Calcular Geração dos Telhados"):
             with st.spinner("Calculando geração com PVLib para os telhados..."):
                 st.session_state["df_telhados_resultados"] = calculopvlib.calcular_geracao_pv(
-                    df_info_geral, df_telhados, ef_painel_t, ef_inversor_t, perdas_t
+                    df_info_geral, df_telhados, ef_painel_t, ef_inversor_t, perdas_t,
+                    modelo_detalhado=detalhado_t, modelo_temperatura="open_rack_glass_glass"
                 )
     else:
         st.warning("Nenhum telhado encontrado no arquivo IFC.")
@@ -130,6 +132,7 @@ if uploaded_file:
                 ef_inversor_j = st.number_input("Eficiência do Inversor (0–1)", 0.0, 1.0, 0.96, 0.01, key="inversor_j")
             with col3j:
                 perdas_j = st.number_input("Perdas do Sistema (0–1)", 0.0, 1.0, 0.15, 0.01, key="perdas_j")
+            detalhado_j = st.checkbox("Modelo detalhado (Perez, IAM e temperatura de célula)", key="detalhado_j", help="Considera a difusa de Perez, o ângulo de incidência e a temperatura do ar e o vento do TMY.")
 
         if st.button("☀️ Calcular Geração das Janelas"):
             df_janelas_pv = df_janelas.copy()
@@ -138,7 +141,8 @@ if uploaded_file:
             
             with st.spinner("Calculando geração com PVLib para as janelas..."):
                 st.session_state["df_janelas_resultados"] = calculopvlib.calcular_geracao_pv(
-                    df_info_geral, df_janelas_pv, ef_painel_j, ef_inversor_j, perdas_j
+                    df_info_geral, df_janelas_pv, ef_painel_j, ef_inversor_j, perdas_j,
+                    modelo_detalhado=detalhado_j, modelo_temperatura="close_mount_glass_glass"
                 )
     else:
         st.warning("Nenhuma janela encontrada no arquivo IFC.")
@@ -165,13 +169,15 @@ if uploaded_file:
                 ef_inversor_p = st.number_input("Eficiência do Inversor (0–1)", 0.0, 1.0, 0.96, 0.01, key="inversor_p")
             with col3p:
                 perdas_p = st.number_input("Perdas do Sistema (0–1)", 0.0, 1.0, 0.16, 0.01, key="perdas_p")
+            detalhado_p = st.checkbox("Modelo detalhado (Perez, IAM e temperatura de célula)", key="detalhado_p", help="Considera a difusa de Perez, o ângulo de incidência e a temperatura do ar e o vento do TMY.")
 
         if st.button("☀️ Calcular Geração das Paredes"):
             df_paredes_pv['Inclinação (°)'] = 90.0
             
             with st.spinner("Calculando geração com PVLib para as paredes..."):
                 st.session_state["df_paredes_resultados"] = calculopvlib.calcular_geracao_pv(
-                    df_info_geral, df_paredes_pv, ef_painel_p, ef_inversor_p, perdas_p
+                    df_info_geral, df_paredes_pv, ef_painel_p, ef_inversor_p, perdas_p,
+                    modelo_detalhado=detalhado_p, modelo_temperatura="close_mount_glass_glass"
                 )
     else:
         st.warning("Nenhuma parede externa encontrada no arquivo IFC.")